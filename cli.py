@@ -8,7 +8,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 try:
     from modules.ingestion import CodebaseIngester
     from modules.chunking import CodeChunker
-    from modules.embeddings import EmbeddingGenerator
+    from modules.embeddings import get_embedder
     from modules.vector_store import VectorStore
     from modules.question_processor import QuestionProcessor
     from modules.rag_generator import RAGGenerator
@@ -65,8 +65,9 @@ class CLIAppState:
     def __init__(self):
         self.ingester = CodebaseIngester()
         self.chunker = CodeChunker()
-        self.embedding_generator = EmbeddingGenerator()
-        self.vector_store = VectorStore()
+        self.embedding_generator = get_embedder()
+        # The embedder always returns L2-normalized vectors
+        self.vector_store = VectorStore(pre_normalized=True)
         self.question_processor = None
         self.rag_generator = None
         self.repository_loaded = False
@@ -90,18 +91,15 @@ def load_repo(repo_path):
             console=console
         ) as progress:
             
-            task = progress.add_task("[cyan]Ingesting files...", total=None)
-            source_files = state.ingester.ingest(repo_path)
+            task = progress.add_task("[cyan]Ingesting and embedding files...", total=None)
+            source_files = state.ingester.iter_files(repo_path)
+            chunk_batches = state.chunker.iter_chunks(source_files)
+            embeddings, chunks = state.embedding_generator.embed_stream(chunk_batches)
             
-            if not source_files:
+            file_count = state.ingester.get_stats()["total_files"]
+            if not file_count:
                 console.print(f"[bold red]Error:[/bold red] No supported source files found in {repo_path}")
                 return False
-
-            progress.update(task, description="[cyan]Chunking files...")
-            chunks = state.chunker.chunk_files(source_files)
-            
-            progress.update(task, description="[cyan]Generating embeddings...")
-            embeddings = state.embedding_generator.embed_chunks(chunks)
             
             progress.update(task, description="[cyan]Storing in vector database...")
             state.vector_store.add_embeddings(embeddings, chunks)
@@ -113,7 +111,7 @@ def load_repo(repo_path):
             state.repository_path = repo_path
             
         console.print(f"[bold green]Success![/bold green] Loaded repository at {repo_path}")
-        console.print(f"Found [bold]{len(source_files)}[/bold] files, created [bold]{len(chunks)}[/bold] chunks.")
+        console.print(f"Found [bold]{file_count}[/bold] files, created [bold]{len(chunks)}[/bold] chunks.")
         return True
 
     except Exception as e:
@@ -171,6 +169,15 @@ def main():
     args = parser.parse_args()
     
     if args.start:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            transient=True,
+            console=console
+        ) as progress:
+            progress.add_task("[cyan]Loading embedding model...", total=None)
+            state.embedding_generator.warmup()
+        
         if args.path:
             load_repo(args.path)
         else:
@@ -11,17 +11,17 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 
 # Supported file extensions for code analysis
-SUPPORTED_EXTENSIONS = {
+SUPPORTED_EXTENSIONS = frozenset({
     ".py",    # Python
     ".js",    # JavaScript
     ".ts",    # TypeScript
     ".java",  # Java
     ".cpp",   # C++
     ".md",    # Markdown documentation
-}
+})
 
 # Directories to ignore during ingestion
-IGNORED_DIRECTORIES = {
+IGNORED_DIRECTORIES = frozenset({
     "node_modules",
     ".git",
     "build",
@@ -32,19 +32,67 @@ IGNORED_DIRECTORIES = {
     ".env",
     ".idea",
     ".vscode",
-}
+})
+
+# Ingestion Configuration
+# Files larger than this many bytes are skipped (generated or vendored code)
+MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", str(1024 * 1024)))
+# Threads used to read files in parallel (0 = min(32, 4 x CPU count))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0"))
 
 # Embedding Model Configuration
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Device for the embedding model: "cuda", "cpu", etc. Empty means auto-detect
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "")
+# Dtype of chunk embeddings handed to the vector store: "fp16" or "fp32"
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "fp16")
+# Reuse chunk embeddings across loads, keyed by a hash of the embedded text
+EMBEDDING_CACHE = os.getenv("EMBEDDING_CACHE", "true").lower() == "true"
+EMBEDDING_CACHE_DIR = os.path.expanduser(
+    os.getenv("EMBEDDING_CACHE_DIR", "~/.cache/codechat/embeddings")
+)
+# Encode queries with an exported ONNX Runtime session (needs optimum[onnxruntime])
+ONNX_QUERY_ENCODER = os.getenv("ONNX_QUERY_ENCODER", "true").lower() == "true"
+ONNX_CACHE_DIR = os.path.expanduser(
+    os.getenv("ONNX_CACHE_DIR", "~/.cache/codechat/onnx")
+)
 
 # Chunking Configuration
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+# Split code on syntax-tree boundaries when tree_sitter_languages is installed
+AST_CHUNKING = os.getenv("AST_CHUNKING", "true").lower() == "true"
 
 # Retrieval Configuration
 TOP_K_RESULTS = int(os.getenv("TOP_K_RESULTS", "5"))
+# Number of recent questions whose retrieval results are kept (0 disables)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "512"))
 
 # LLM Configuration
 # Available models: gemini-pro-latest, gemini-flash-latest, gemini-2.5-flash, gemini-2.5-pro
 # Use model name WITHOUT "models/" prefix when creating GenerativeModel
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-flash-latest")
+
+# Vector Store Configuration
+# Index types: "auto" (flat below HNSW_MIN_VECTORS, HNSW above, IVF-PQ from
+# IVF_MIN_VECTORS), "flat", "hnsw", or "ivf" (inverted lists; combine with
+# VECTOR_QUANTIZATION=pq for IVF-PQ)
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "auto")
+HNSW_MIN_VECTORS = int(os.getenv("HNSW_MIN_VECTORS", "10000"))
+IVF_MIN_VECTORS = int(os.getenv("IVF_MIN_VECTORS", "100000"))
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))  # Inverted lists scanned per query
+# Vectors used to train IVF centroids and quantizer codebooks
+MAX_TRAINING_VECTORS = int(os.getenv("MAX_TRAINING_VECTORS", "100000"))
+# Compression of stored vectors: "none", "fp16", "int8" or "pq" (product quantization)
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "fp16")
+PQ_M = int(os.getenv("PQ_M", "48"))  # Sub-quantizers, must divide the dimension
+# Persist built indexes and reuse them when a repository is unchanged
+INDEX_CACHE = os.getenv("INDEX_CACHE", "true").lower() == "true"
+INDEX_CACHE_DIR = os.path.expanduser(
+    os.getenv("INDEX_CACHE_DIR", "~/.cache/codechat/indexes")
+)
+# OpenMP threads used by FAISS for index builds and batched search (0 = FAISS default)
+FAISS_THREADS = int(os.getenv("FAISS_THREADS", "0"))
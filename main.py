@@ -17,18 +17,21 @@ if sys.platform == 'win32':
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
+import hashlib
+import json
 import os
 
 # Import modules
 from modules.ingestion import CodebaseIngester
 from modules.chunking import CodeChunker
-from modules.embeddings import EmbeddingGenerator
+from modules.embeddings import get_embedder
 from modules.vector_store import VectorStore
 from modules.question_processor import QuestionProcessor
 from modules.rag_generator import RAGGenerator, RAGResponse
+from config import INDEX_CACHE, INDEX_CACHE_DIR
 
 
 # =============================================================================
@@ -116,8 +119,9 @@ class AppState:
     def __init__(self):
         self.ingester = CodebaseIngester()
         self.chunker = CodeChunker()
-        self.embedding_generator = EmbeddingGenerator()
-        self.vector_store = VectorStore()
+        self.embedding_generator = get_embedder()
+        # The embedder always returns L2-normalized vectors
+        self.vector_store = VectorStore(pre_normalized=True)
         self.question_processor: Optional[QuestionProcessor] = None
         self.rag_generator: Optional[RAGGenerator] = None
         
@@ -130,6 +134,12 @@ class AppState:
 state = AppState()
 
 
+@app.on_event("startup")
+async def warmup():
+    """Load and warm the embedding model before serving the first request."""
+    state.embedding_generator.warmup()
+
+
 # =============================================================================
 # API Endpoints
 # =============================================================================
@@ -157,6 +167,107 @@ async def get_status():
     )
 
 
+def _index_cache_path(repo_path: str) -> str:
+    """
+    Get the saved-index base path for a repository and the current settings.
+    
+    The key covers every setting that changes the built index, but not
+    the repository contents, so each repository keeps a single saved
+    index that is overwritten whenever it is rebuilt.
+    """
+    key = "\0".join(str(part) for part in (
+        repo_path,
+        state.embedding_generator.model_name,
+        state.embedding_generator.dtype.__name__,
+        state.chunker.chunk_size,
+        state.chunker.chunk_overlap,
+        state.chunker.use_ast,
+        state.vector_store.index_type,
+        state.vector_store.quantization,
+    ))
+    signature = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(INDEX_CACHE_DIR, signature)
+
+
+def _load_cached_index(cache_path: str, fingerprint: str) -> Optional[tuple]:
+    """Load a saved index into the state, returning its load stats on a hit."""
+    if not VectorStore.exists(cache_path):
+        return None
+    
+    try:
+        with open(f"{cache_path}.stats.json", "r", encoding="utf-8") as f:
+            stats = json.load(f)
+        # Files were added, removed or modified since the index was saved
+        if stats.get("fingerprint") != fingerprint:
+            return None
+        state.vector_store = VectorStore.load(cache_path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[!] Ignoring unreadable saved index: {e}")
+        return None
+    
+    return stats["files"], stats["chunks"]
+
+
+def _save_cached_index(
+    cache_path: str,
+    fingerprint: str,
+    ingest_stats: dict,
+    chunk_stats: dict
+) -> None:
+    """Save the built index so an unchanged repository loads instantly."""
+    stats_path = f"{cache_path}.stats.json"
+    try:
+        os.makedirs(INDEX_CACHE_DIR, exist_ok=True)
+        # The stats file carries the fingerprint and is written last,
+        # so an interrupted save can't be mistaken for a current index
+        if os.path.exists(stats_path):
+            os.remove(stats_path)
+        state.vector_store.save(cache_path)
+        
+        with open(f"{stats_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(
+                {"fingerprint": fingerprint, "files": ingest_stats, "chunks": chunk_stats},
+                f
+            )
+        os.replace(f"{stats_path}.tmp", stats_path)
+    except Exception as e:
+        print(f"[!] Could not save index: {e}")
+
+
+def _build_index(repo_path: str) -> tuple:
+    """
+    Ingest, chunk, embed and store a repository.
+    
+    Returns:
+        Tuple of (ingest stats, chunk stats)
+    """
+    # Steps 1-3: Ingest, chunk and embed as an overlapping pipeline
+    print(f"[*] Ingesting, chunking and embedding files from: {repo_path}")
+    source_files = state.ingester.iter_files(repo_path)
+    chunk_batches = state.chunker.iter_chunks(source_files)
+    embeddings, chunks = state.embedding_generator.embed_stream(chunk_batches)
+    
+    ingest_stats = state.ingester.get_stats()
+    if not ingest_stats["total_files"]:
+        raise HTTPException(
+            status_code=400,
+            detail="No supported source files found in the repository"
+        )
+    print(f"   Found {ingest_stats['total_files']} files")
+    
+    chunk_stats = state.chunker.get_stats(chunks)
+    print(f"   Created {chunk_stats['total_chunks']} chunks")
+    print(f"   Generated {len(embeddings)} embeddings")
+    
+    # Step 4: Store in vector database
+    print("[*] Storing in vector database...")
+    state.vector_store.add_embeddings(embeddings, chunks)
+    
+    return ingest_stats, chunk_stats
+
+
 @app.post("/load", response_model=LoadRepositoryResponse, tags=["Repository"])
 async def load_repository(request: LoadRepositoryRequest):
     """
@@ -167,6 +278,11 @@ async def load_repository(request: LoadRepositoryRequest):
     2. Split files into chunks
     3. Generate embeddings
     4. Store in vector database
+    
+    Steps 1-3 run as a streaming pipeline so embedding starts
+    while later files are still being read and chunked. If the
+    repository is unchanged since a previous load, the saved index
+    is reused and all four steps are skipped.
     """
     try:
         # Resolve the path
@@ -187,33 +303,19 @@ async def load_repository(request: LoadRepositoryRequest):
         # Clear previous state
         state.vector_store.clear()
         
-        # Step 1: Ingest files
-        print(f"[*] Ingesting files from: {repo_path}")
-        source_files = state.ingester.ingest(repo_path)
-        
-        if not source_files:
-            raise HTTPException(
-                status_code=400,
-                detail="No supported source files found in the repository"
-            )
+        cached_stats = None
+        if INDEX_CACHE:
+            cache_path = _index_cache_path(repo_path)
+            fingerprint = state.ingester.fingerprint(repo_path)
+            cached_stats = _load_cached_index(cache_path, fingerprint)
         
-        ingest_stats = state.ingester.get_stats(source_files)
-        print(f"   Found {ingest_stats['total_files']} files")
-        
-        # Step 2: Chunk files
-        print("[*] Chunking files...")
-        chunks = state.chunker.chunk_files(source_files)
-        chunk_stats = state.chunker.get_stats(chunks)
-        print(f"   Created {chunk_stats['total_chunks']} chunks")
-        
-        # Step 3: Generate embeddings
-        print("[*] Generating embeddings...")
-        embeddings = state.embedding_generator.embed_chunks(chunks)
-        print(f"   Generated {len(embeddings)} embeddings")
-        
-        # Step 4: Store in vector database
-        print("[*] Storing in vector database...")
-        state.vector_store.add_embeddings(embeddings, chunks)
+        if cached_stats:
+            print(f"[*] Repository unchanged, reusing saved index: {cache_path}")
+            ingest_stats, chunk_stats = cached_stats
+        else:
+            ingest_stats, chunk_stats = _build_index(repo_path)
+            if INDEX_CACHE:
+                _save_cached_index(cache_path, fingerprint, ingest_stats, chunk_stats)
         
         # Initialize processors
         state.question_processor = QuestionProcessor(
@@ -276,8 +378,8 @@ async def ask_question(request: AskQuestionRequest):
         if request.top_k:
             state.question_processor.top_k = request.top_k
         
-        # Generate response
-        response: RAGResponse = state.rag_generator.generate(request.question)
+        # Generate response without blocking the event loop
+        response: RAGResponse = await state.rag_generator.generate_async(request.question)
         
         return AskQuestionResponse(
             answer=response.answer,
@@ -294,6 +396,57 @@ async def ask_question(request: AskQuestionRequest):
         )
 
 
+def _sse_event(event: str, data: dict) -> str:
+    """Format a Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/ask/stream", tags=["Q&A"])
+async def ask_question_stream(request: AskQuestionRequest):
+    """
+    Ask a question and stream the answer as Server-Sent Events.
+    
+    Emits a `sources` event with the retrieved files, then `answer`
+    events carrying text as the LLM produces it, then `done`.
+    """
+    if not state.repository_loaded:
+        raise HTTPException(
+            status_code=400,
+            detail="No repository loaded. Call /load first."
+        )
+    
+    if not state.rag_generator:
+        raise HTTPException(
+            status_code=500,
+            detail="RAG generator not initialized"
+        )
+    
+    try:
+        if request.top_k:
+            state.question_processor.top_k = request.top_k
+        
+        results = await state.rag_generator.retrieve(request.question)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generating answer: {str(e)}"
+        )
+    
+    async def event_generator():
+        yield _sse_event("sources", {
+            "source_files": state.question_processor.get_file_references(results),
+            "chunks_used": len(results)
+        })
+        async for text in state.rag_generator.stream(request.question, results):
+            yield _sse_event("answer", {"text": text})
+        yield _sse_event("done", {})
+    
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+
 @app.post("/search", tags=["Q&A"])
 async def search_code(request: AskQuestionRequest):
     """
@@ -307,11 +460,17 @@ async def search_code(request: AskQuestionRequest):
             detail="No repository loaded. Call /load first."
         )
     
+    if not state.rag_generator:
+        raise HTTPException(
+            status_code=500,
+            detail="RAG generator not initialized"
+        )
+    
     try:
         if request.top_k:
             state.question_processor.top_k = request.top_k
         
-        results = state.question_processor.process(request.question)
+        results = await state.rag_generator.retrieve(request.question)
         
         return {
             "results": [
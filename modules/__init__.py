@@ -3,7 +3,7 @@ RAG Codebase Analysis System - Core Modules
 """
 from .ingestion import CodebaseIngester
 from .chunking import CodeChunker
-from .embeddings import EmbeddingGenerator
+from .embeddings import EmbeddingGenerator, get_embedder
 from .vector_store import VectorStore
 from .question_processor import QuestionProcessor
 from .rag_generator import RAGGenerator
@@ -12,6 +12,7 @@ __all__ = [
     "CodebaseIngester",
     "CodeChunker", 
     "EmbeddingGenerator",
+    "get_embedder",
     "VectorStore",
     "QuestionProcessor",
     "RAGGenerator",
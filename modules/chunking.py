@@ -4,8 +4,11 @@ Code Chunking Module
 Splits large source files into smaller, meaningful chunks
 while maintaining logical coherence and metadata.
 """
-from typing import List
-from dataclasses import dataclass
+import itertools
+from typing import List, Iterable, Iterator, Tuple
+from dataclasses import dataclass, replace
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 
 from langchain_text_splitters import (
     RecursiveCharacterTextSplitter,
@@ -15,9 +18,15 @@ from langchain_text_splitters import (
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import CHUNK_SIZE, CHUNK_OVERLAP
+from config import CHUNK_SIZE, CHUNK_OVERLAP, AST_CHUNKING
 from modules.ingestion import SourceFile
 
+try:
+    from tree_sitter_languages import get_parser
+    TREE_SITTER_AVAILABLE = True
+except ImportError:
+    TREE_SITTER_AVAILABLE = False
+
 
 # Map file extensions to LangChain Language enum
 EXTENSION_TO_LANGUAGE = {
@@ -29,8 +38,163 @@ EXTENSION_TO_LANGUAGE = {
     ".md": Language.MARKDOWN,
 }
 
+# Map file extensions to tree-sitter grammar names (Markdown stays on LangChain)
+EXTENSION_TO_TREE_SITTER = {
+    ".py": "python",
+    ".js": "javascript",
+    ".ts": "typescript",
+    ".java": "java",
+    ".cpp": "cpp",
+}
+
+# Below this many files, process start-up costs more than it saves
+PARALLEL_MIN_FILES = 8
+
+# Splitters and parsers are cached per process so pool workers build their own
+_SPLITTER_CACHE = {}
+_PARSER_CACHE = {}
+
+
+def _get_splitter_for(
+    extension: str,
+    chunk_size: int,
+    chunk_overlap: int
+) -> RecursiveCharacterTextSplitter:
+    """
+    Get or create a language-specific text splitter.
+    
+    Args:
+        extension: File extension (e.g., '.py')
+        chunk_size: Maximum size of each chunk in characters
+        chunk_overlap: Number of overlapping characters between chunks
+        
+    Returns:
+        Configured text splitter for the language
+    """
+    key = (extension, chunk_size, chunk_overlap)
+    
+    if key not in _SPLITTER_CACHE:
+        language = EXTENSION_TO_LANGUAGE.get(extension)
+        
+        if language:
+            _SPLITTER_CACHE[key] = RecursiveCharacterTextSplitter.from_language(
+                language=language,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap
+            )
+        else:
+            # Fallback for unsupported languages
+            _SPLITTER_CACHE[key] = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                separators=["\n\n", "\n", " ", ""]
+            )
+    
+    return _SPLITTER_CACHE[key]
+
+
+def _get_parser_for(extension: str):
+    """
+    Get a cached tree-sitter parser for a file extension.
+    
+    Returns:
+        Parser, or None if the language has no usable grammar
+    """
+    if extension not in _PARSER_CACHE:
+        grammar = EXTENSION_TO_TREE_SITTER.get(extension)
+        parser = None
+        
+        if grammar and TREE_SITTER_AVAILABLE:
+            try:
+                parser = get_parser(grammar)
+            except Exception:
+                parser = None  # Grammar missing or incompatible tree-sitter build
+        
+        _PARSER_CACHE[extension] = parser
+    
+    return _PARSER_CACHE[extension]
+
+
+# tree-sitter fields holding the part of a definition that follows its header
+_BODY_FIELDS = ("body", "definition")
+
+
+def _split_syntax_node(
+    node,
+    source: bytes,
+    max_size: int,
+    start: int,
+    current: bytes = b"",
+    separable: int = 0
+) -> Tuple[List[bytes], bytes]:
+    """
+    Group a node's children into pieces of at most max_size bytes.
+    
+    Consecutive siblings (functions, classes, statements) are packed
+    together; a child too large on its own is split along its own
+    children. Text between siblings is kept with the following one.
+    Text still pending when descending into a child (such as a class
+    header or decorators) is carried into the child's first piece, so
+    headers stay attached to the start of their body.
+    
+    Args:
+        node: tree-sitter node whose children are grouped
+        source: Source bytes the tree was parsed from
+        max_size: Maximum size of each piece
+        start: Byte offset where this node's first piece begins
+        current: Pending text the first piece continues
+        separable: Length of the leading part of current (earlier,
+            complete siblings) that may be cut off into its own piece
+        
+    Returns:
+        Tuple of (finished pieces in order, trailing piece that
+        following siblings may still be packed into)
+    """
+    pieces = []
+    last_end = start
+    bodies = [node.child_by_field_name(field) for field in _BODY_FIELDS]
+    
+    for child in node.children:
+        segment = source[last_end:child.end_byte]
+        is_body = child in bodies
+        
+        if len(current) + len(segment) <= max_size:
+            current += segment
+        elif child.children and (len(segment) > max_size or is_body):
+            # A definition's body keeps this node's header (and decorators)
+            # in its first piece; any other child starts a new sibling
+            child_separable = separable if is_body else len(current)
+            child_pieces, current = _split_syntax_node(
+                child, source, max_size, last_end, current, child_separable
+            )
+            pieces.extend(child_pieces)
+            separable = 0
+        else:
+            kept = current[separable:]
+            if separable and len(kept) + len(segment) <= max_size:
+                # Cut off earlier siblings but keep the header with this text
+                pieces.append(current[:separable])
+                current = kept + segment
+            else:
+                if current:
+                    pieces.append(current)
+                current = segment
+            separable = 0
+        
+        last_end = child.end_byte
+
+    # Text after the last child (e.g. string content after an escape)
+    tail = source[last_end:node.end_byte]
+    if tail:
+        if current and len(current) + len(tail) > max_size:
+            pieces.append(current)
+            current = b""
+        current += tail
+
+    return pieces, current
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class CodeChunk:
     """Represents a chunk of code with metadata."""
     content: str
@@ -39,6 +203,8 @@ class CodeChunk:
     chunk_index: int
     total_chunks: int
     language: str
+    # Hash of the whole source file, shared by files with identical content
+    content_hash: str = ""
 
 
 class CodeChunker:
@@ -46,49 +212,67 @@ class CodeChunker:
     Splits source files into semantically meaningful chunks.
     
     Uses language-aware splitting to preserve code structure
-    like function and class boundaries where possible.
+    like function and class boundaries where possible. Code is
+    split on tree-sitter syntax nodes when available, falling
+    back to LangChain's recursive character splitter.
     """
     
-    def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
+    def __init__(
+        self,
+        chunk_size: int = None,
+        chunk_overlap: int = None,
+        max_workers: int = None,
+        use_ast: bool = None
+    ):
         """
         Initialize the chunker with size parameters.
         
         Args:
             chunk_size: Maximum size of each chunk in characters
             chunk_overlap: Number of overlapping characters between chunks
+            max_workers: Processes used to split larger inputs (defaults to CPU count)
+            use_ast: Whether to split code on syntax-tree boundaries
         """
         self.chunk_size = chunk_size or CHUNK_SIZE
         self.chunk_overlap = chunk_overlap or CHUNK_OVERLAP
-        self._splitters = {}
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_ast = AST_CHUNKING if use_ast is None else use_ast
     
     def _get_splitter(self, extension: str) -> RecursiveCharacterTextSplitter:
+        """Get the text splitter for a file extension."""
+        return _get_splitter_for(extension, self.chunk_size, self.chunk_overlap)
+    
+    def _split_ast(self, source_file: SourceFile) -> List[str]:
         """
-        Get or create a language-specific text splitter.
+        Split a file along its syntax tree.
         
         Args:
-            extension: File extension (e.g., '.py')
+            source_file: The source file to split
             
         Returns:
-            Configured text splitter for the language
+            List of text chunks, or an empty list if no parser applies
         """
-        if extension not in self._splitters:
-            language = EXTENSION_TO_LANGUAGE.get(extension)
-            
-            if language:
-                self._splitters[extension] = RecursiveCharacterTextSplitter.from_language(
-                    language=language,
-                    chunk_size=self.chunk_size,
-                    chunk_overlap=self.chunk_overlap
-                )
+        parser = _get_parser_for(source_file.extension) if self.use_ast else None
+        if parser is None:
+            return []
+        
+        source = source_file.content.encode("utf-8")
+        tree = parser.parse(source)
+        pieces, trailing = _split_syntax_node(tree.root_node, source, self.chunk_size, 0)
+        pieces.append(trailing)
+        
+        text_chunks = []
+        for piece in pieces:
+            text = piece.decode("utf-8", errors="ignore").strip()
+            if not text:
+                continue
+            if len(text) > self.chunk_size:
+                # Oversized leaf (e.g. a huge string literal)
+                text_chunks.extend(self._get_splitter(source_file.extension).split_text(text))
             else:
-                # Fallback for unsupported languages
-                self._splitters[extension] = RecursiveCharacterTextSplitter(
-                    chunk_size=self.chunk_size,
-                    chunk_overlap=self.chunk_overlap,
-                    separators=["\n\n", "\n", " ", ""]
-                )
+                text_chunks.append(text)
         
-        return self._splitters[extension]
+        return text_chunks
     
     def chunk_file(self, source_file: SourceFile) -> List[CodeChunk]:
         """
@@ -100,42 +284,176 @@ class CodeChunker:
         Returns:
             List of CodeChunk objects
         """
-        splitter = self._get_splitter(source_file.extension)
-        
-        # Split the content
-        text_chunks = splitter.split_text(source_file.content)
+        # Split the content, preferring syntax-tree boundaries
+        text_chunks = self._split_ast(source_file)
+        if not text_chunks:
+            splitter = self._get_splitter(source_file.extension)
+            text_chunks = splitter.split_text(source_file.content)
         
         # Create CodeChunk objects with metadata
-        chunks = []
-        for i, content in enumerate(text_chunks):
-            chunks.append(CodeChunk(
+        total = len(text_chunks)
+        language = source_file.extension.lstrip('.')
+        
+        return [
+            CodeChunk(
                 content=content,
                 file_path=source_file.file_path,
                 relative_path=source_file.relative_path,
                 chunk_index=i,
-                total_chunks=len(text_chunks),
-                language=source_file.extension.lstrip('.')
-            ))
-        
-        return chunks
+                total_chunks=total,
+                language=language,
+                content_hash=source_file.content_hash
+            )
+            for i, content in enumerate(text_chunks)
+        ]
     
     def chunk_files(self, source_files: List[SourceFile]) -> List[CodeChunk]:
         """
         Split multiple source files into chunks.
         
+        Splitting is pure-Python and CPU-bound, so larger inputs are
+        spread across a process pool. Output order matches input order.
+        
         Args:
             source_files: List of source files to chunk
             
         Returns:
             List of all CodeChunk objects from all files
         """
-        all_chunks = []
+        return [chunk for batch in self.iter_chunks(source_files) for chunk in batch]
+    
+    def iter_chunks(
+        self,
+        source_files: Iterable[SourceFile],
+        batch_size: int = 256
+    ) -> Iterator[List[CodeChunk]]:
+        """
+        Lazily split source files into batches of chunks.
+        
+        Streams with more than PARALLEL_MIN_FILES files are split on a
+        process pool, with a bounded number of files in flight so only
+        a window of files and the current batch are held in memory.
+        Files with the same content and extension as an earlier file
+        are not split again; they get copies of its chunks under their
+        own paths.
+        
+        Args:
+            source_files: Iterable of source files to chunk
+            batch_size: Approximate number of chunks per batch
+            
+        Returns:
+            Iterator of CodeChunk lists in file order
+        """
+        source_files = iter(source_files)
+        # Peek far enough to tell whether a process pool pays for itself
+        head = list(itertools.islice(source_files, PARALLEL_MIN_FILES + 1))
+        
+        # Only the first file with a given content is split; copies reuse its chunks
+        order = deque()
+        first_copies = self._first_copies(itertools.chain(head, source_files), order)
+        
+        if len(head) <= PARALLEL_MIN_FILES or self.max_workers <= 1:
+            file_chunks = map(self.chunk_file, first_copies)
+            yield from self._batch(self._with_copies(file_chunks, order), batch_size)
+            return
+        
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            file_chunks = self._chunk_in_pool(executor, first_copies)
+            yield from self._batch(self._with_copies(file_chunks, order), batch_size)
+    
+    @staticmethod
+    def _content_key(source_file: SourceFile) -> tuple:
+        """Key under which files split into identical chunks."""
+        return (source_file.content_hash, source_file.extension)
+    
+    def _first_copies(
+        self,
+        source_files: Iterable[SourceFile],
+        order: deque
+    ) -> Iterator[SourceFile]:
+        """
+        Yield each file whose content hasn't been seen yet.
+        
+        Every file is appended to ``order`` with a flag telling whether
+        it was yielded, so _with_copies can restore the full sequence.
+        """
+        seen = set()
         
         for source_file in source_files:
-            chunks = self.chunk_file(source_file)
-            all_chunks.extend(chunks)
+            key = self._content_key(source_file)
+            first = not source_file.content_hash or key not in seen
+            if first:
+                seen.add(key)
+            order.append((source_file, first))
+            if first:
+                yield source_file
+    
+    def _with_copies(
+        self,
+        file_chunks: Iterable[List[CodeChunk]],
+        order: deque
+    ) -> Iterator[List[CodeChunk]]:
+        """Interleave chunks for duplicate files, re-pathed from their first copy."""
+        by_content = {}
+        
+        def copies_until_first():
+            while order:
+                source_file, first = order.popleft()
+                if first:
+                    return source_file
+                chunks = by_content[self._content_key(source_file)]
+                yield [
+                    replace(
+                        chunk,
+                        file_path=source_file.file_path,
+                        relative_path=source_file.relative_path
+                    )
+                    for chunk in chunks
+                ]
+            return None
+        
+        for chunks in file_chunks:
+            source_file = yield from copies_until_first()
+            if source_file.content_hash:
+                by_content[self._content_key(source_file)] = chunks
+            yield chunks
+        
+        # Copies after the last first-seen file
+        yield from copies_until_first()
+    
+    def _chunk_in_pool(
+        self,
+        executor: ProcessPoolExecutor,
+        source_files: Iterator[SourceFile]
+    ) -> Iterator[List[CodeChunk]]:
+        """Chunk files on a pool, keeping a bounded window of files in flight."""
+        window = self.max_workers * 4
+        pending = deque()
+        
+        for source_file in source_files:
+            pending.append(executor.submit(self.chunk_file, source_file))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        
+        while pending:
+            yield pending.popleft().result()
+    
+    @staticmethod
+    def _batch(
+        file_chunks: Iterable[List[CodeChunk]],
+        batch_size: int
+    ) -> Iterator[List[CodeChunk]]:
+        """Regroup per-file chunk lists into batches of about batch_size."""
+        batch = []
+        
+        for chunks in file_chunks:
+            batch.extend(chunks)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
         
-        return all_chunks
+        if batch:
+            yield batch
     
     def get_stats(self, chunks: List[CodeChunk]) -> dict:
         """
@@ -150,15 +468,16 @@ class CodeChunker:
         if not chunks:
             return {"total_chunks": 0, "avg_chunk_size": 0, "by_language": {}}
         
-        total_chars = sum(len(c.content) for c in chunks)
-        by_language = {}
+        # Single pass over the chunks
+        total_chars = 0
+        by_language = Counter()
         
         for chunk in chunks:
-            lang = chunk.language
-            by_language[lang] = by_language.get(lang, 0) + 1
+            total_chars += len(chunk.content)
+            by_language[chunk.language] += 1
         
         return {
             "total_chunks": len(chunks),
             "avg_chunk_size": total_chars // len(chunks),
-            "by_language": by_language
+            "by_language": dict(by_language)
         }
@@ -0,0 +1,102 @@
+"""
+Embedding Cache Module
+
+Persists chunk embeddings on disk keyed by a hash of the
+embedded text, so unchanged chunks skip the model on reload.
+"""
+import hashlib
+import sqlite3
+from contextlib import closing
+from typing import Dict, List
+
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import EMBEDDING_CACHE_DIR
+
+
+# Stay below SQLite's bound-parameter limit on older builds
+_QUERY_BATCH = 500
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed store of embedding vectors.
+    
+    One database file is kept per model and dtype, so switching
+    models never returns vectors from a different embedding space.
+    """
+    
+    def __init__(self, model_name: str, dtype: np.dtype, cache_dir: str = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            model_name: Identifier of the model producing the vectors
+            dtype: Numpy dtype the vectors are stored in
+            cache_dir: Directory holding the cache databases
+        """
+        self.dtype = np.dtype(dtype)
+        self.cache_dir = cache_dir or EMBEDDING_CACHE_DIR
+        
+        safe_name = model_name.replace("/", "__").replace("\\", "__")
+        self.path = os.path.join(
+            self.cache_dir, f"{safe_name}-{self.dtype.name}.sqlite"
+        )
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+    
+    @staticmethod
+    def key_for(text: str) -> str:
+        """Get the cache key for a piece of text."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up cached vectors.
+        
+        Args:
+            keys: Cache keys to fetch
+            
+        Returns:
+            Mapping of found keys to their vectors
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        
+        with closing(sqlite3.connect(self.path)) as conn:
+            for start in range(0, len(unique_keys), _QUERY_BATCH):
+                batch = unique_keys[start:start + _QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=self.dtype)
+        
+        return found
+    
+    def set_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        """
+        Store vectors under their keys.
+        
+        Args:
+            keys: Cache keys, one per row of vectors
+            vectors: Numpy array of shape (len(keys), dimension)
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=self.dtype)
+        rows = [(key, vector.tobytes()) for key, vector in zip(keys, vectors)]
+        
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                rows
+            )
@@ -4,15 +4,37 @@ Embedding Generation Module
 Converts code chunks into vector representations
 using sentence-transformers models.
 """
+import queue
+import threading
 import numpy as np
-from typing import List, Union
+from typing import List, Union, Iterable, Tuple, Optional
 from sentence_transformers import SentenceTransformer
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import EMBEDDING_MODEL
+from config import (
+    EMBEDDING_MODEL,
+    EMBEDDING_DEVICE,
+    EMBEDDING_DTYPE,
+    EMBEDDING_CACHE,
+    ONNX_QUERY_ENCODER,
+    ONNX_CACHE_DIR,
+)
 from modules.chunking import CodeChunk
+from modules.embedding_cache import EmbeddingCache
+
+
+EMBEDDING_DTYPES = {"fp16": np.float16, "fp32": np.float32}
+
+try:
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTOptimizer
+    from optimum.onnxruntime.configuration import AutoOptimizationConfig
+    from transformers import AutoTokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
 
 
 class EmbeddingGenerator:
@@ -23,29 +45,94 @@ class EmbeddingGenerator:
     semantic similarity matching.
     """
     
-    def __init__(self, model_name: str = None):
+    def __init__(
+        self,
+        model_name: str = None,
+        device: str = None,
+        dtype: str = None,
+        use_cache: bool = None
+    ):
         """
         Initialize the embedding generator.
         
         Args:
             model_name: HuggingFace model identifier
+            device: Torch device for the model (auto-detected if omitted)
+            dtype: Dtype of batch embeddings, "fp16" or "fp32"
+            use_cache: Whether to reuse chunk embeddings from disk
+            
+        Raises:
+            ValueError: If the dtype is not recognized
         """
+        dtype = (dtype or EMBEDDING_DTYPE).lower()
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(
+                f"Unknown embedding dtype: {dtype} "
+                f"(expected one of {', '.join(EMBEDDING_DTYPES)})"
+            )
+        
         self.model_name = model_name or EMBEDDING_MODEL
+        self.dtype = EMBEDDING_DTYPES[dtype]
+        self._device = device or EMBEDDING_DEVICE or None
         self._model = None
+        self.use_cache = EMBEDDING_CACHE if use_cache is None else use_cache
+        self._cache = None
+        # ONNX query encoder: None = not tried yet, False = unavailable
+        self._ort_session = None
+        self._ort_tokenizer = None
+    
+    @property
+    def device(self) -> str:
+        """Get the device the model runs on, preferring CUDA when available."""
+        if self._device is None:
+            import torch
+            self._device = "cuda" if torch.cuda.is_available() else "cpu"
+        return self._device
+    
+    @property
+    def on_gpu(self) -> bool:
+        """Check whether the model runs on a CUDA device."""
+        return self.device.startswith("cuda")
     
     @property
     def model(self) -> SentenceTransformer:
         """Lazy load the embedding model."""
         if self._model is None:
-            print(f"Loading embedding model: {self.model_name}")
-            self._model = SentenceTransformer(self.model_name)
+            print(f"Loading embedding model: {self.model_name} ({self.device})")
+            self._model = SentenceTransformer(self.model_name, device=self.device)
+            if self.on_gpu:
+                # fp16 uses tensor cores and halves activation bandwidth
+                self._model.half()
         return self._model
     
+    @property
+    def cache(self) -> EmbeddingCache:
+        """Lazy open the on-disk embedding cache for this model."""
+        if self._cache is None:
+            self._cache = EmbeddingCache(self.model_name, self.dtype)
+        return self._cache
+    
+    @property
+    def lowercases_input(self) -> bool:
+        """Check whether the model's tokenizer lowercases text (uncased models)."""
+        tokenizer = getattr(self.model, "tokenizer", None)
+        return bool(getattr(tokenizer, "do_lower_case", False))
+    
     @property
     def embedding_dimension(self) -> int:
         """Get the dimension of embeddings produced by the model."""
         return self.model.get_sentence_embedding_dimension()
     
+    def warmup(self) -> None:
+        """
+        Load the model and run one encode through each path.
+        
+        Moves model loading, ONNX export and first-call kernel setup
+        out of the first real request.
+        """
+        self.generate_embedding("warmup")
+        self.embed_query("warmup")
+    
     def generate_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single piece of text.
@@ -54,67 +141,372 @@ class EmbeddingGenerator:
             text: Text to embed
             
         Returns:
-            Numpy array of the embedding vector
+            Numpy array of the L2-normalized embedding vector
         """
-        return self.model.encode(text, convert_to_numpy=True)
+        embedding = self.model.encode(
+            text,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        return embedding.astype(np.float32, copy=False)
     
     def generate_embeddings(
         self, 
         texts: List[str], 
-        batch_size: int = 32,
+        batch_size: int = None,
         show_progress: bool = True
     ) -> np.ndarray:
         """
         Generate embeddings for multiple texts.
         
+        SentenceTransformer.encode length-sorts texts before batching
+        and restores input order, so batches pad only to similar-length
+        neighbours and larger batch sizes stay cheap.
+        
         Args:
             texts: List of texts to embed
             batch_size: Number of texts to process at once
+                (defaults to 256 on GPU, 64 on CPU)
             show_progress: Whether to show progress bar
             
         Returns:
-            Numpy array of shape (n_texts, embedding_dim)
+            Numpy array of shape (n_texts, embedding_dim) holding
+            L2-normalized vectors in the configured dtype
         """
+        if batch_size is None:
+            batch_size = 256 if self.on_gpu else 64
+        
         embeddings = self.model.encode(
             texts,
             batch_size=batch_size,
             show_progress_bar=show_progress,
-            convert_to_numpy=True
+            convert_to_numpy=True,
+            normalize_embeddings=True
         )
-        return embeddings
+        # Unit vectors only need direction, which fp16 keeps well
+        return embeddings.astype(self.dtype, copy=False)
     
     def embed_chunks(
         self, 
         chunks: List[CodeChunk],
-        batch_size: int = 32
+        batch_size: int = None,
+        show_progress: bool = True
     ) -> np.ndarray:
         """
         Generate embeddings for code chunks.
         
+        Chunks whose enriched text was embedded before by the same
+        model are read from the disk cache; only the rest are encoded.
+        
         Args:
             chunks: List of CodeChunk objects
             batch_size: Number of chunks to process at once
+            show_progress: Whether to show progress bar
             
         Returns:
             Numpy array of embeddings
         """
-        # Create enriched text with metadata context
-        texts = []
-        for chunk in chunks:
-            # Add file context to help with retrieval
-            enriched_text = f"File: {chunk.relative_path}\nLanguage: {chunk.language}\n\n{chunk.content}"
-            texts.append(enriched_text)
+        # Create enriched text with file context to help with retrieval
+        texts = [
+            f"File: {c.relative_path}\nLanguage: {c.language}\n\n{c.content}"
+            for c in chunks
+        ]
+        
+        if not self.use_cache or not texts:
+            return self.generate_embeddings(
+                texts, batch_size=batch_size, show_progress=show_progress
+            )
         
-        return self.generate_embeddings(texts, batch_size=batch_size)
+        keys = [EmbeddingCache.key_for(text) for text in texts]
+        cached = self.cache.get_many(keys)
+        
+        embeddings = np.empty((len(texts), self.embedding_dimension), dtype=self.dtype)
+        misses = []
+        for i, key in enumerate(keys):
+            vector = cached.get(key)
+            if vector is None:
+                misses.append(i)
+            else:
+                embeddings[i] = vector
+        
+        if misses:
+            encoded = self.generate_embeddings(
+                [texts[i] for i in misses],
+                batch_size=batch_size,
+                show_progress=show_progress
+            )
+            embeddings[misses] = encoded
+            self.cache.set_many([keys[i] for i in misses], encoded)
+        
+        return embeddings
+    
+    def embed_stream(
+        self,
+        chunk_batches: Iterable[List[CodeChunk]],
+        batch_size: int = None,
+        queue_size: int = 4
+    ) -> Tuple[np.ndarray, List[CodeChunk]]:
+        """
+        Embed chunk batches while they are still being produced.
+        
+        A background thread pulls batches (and so drives file reading
+        and chunking) into a bounded queue while this thread encodes,
+        overlapping I/O and splitting with the model forward pass.
+        
+        Args:
+            chunk_batches: Iterable of CodeChunk lists, usually lazy
+            batch_size: Number of chunks to encode at once
+            queue_size: Maximum number of batches waiting to be embedded
+            
+        Returns:
+            Tuple of (embeddings array, chunks in matching order)
+        """
+        pending = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+        done = object()
+        
+        def produce():
+            try:
+                for batch in chunk_batches:
+                    if stop.is_set():
+                        break
+                    pending.put(batch)
+            except Exception as e:
+                pending.put(e)
+            finally:
+                pending.put(done)
+        
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        
+        all_chunks: List[CodeChunk] = []
+        parts: List[np.ndarray] = []
+        # (part, row) of the first embedding of each chunk from a file's content
+        first_rows = {}
+        
+        try:
+            while True:
+                item = pending.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                parts.append(self._embed_batch_reusing(item, batch_size, parts, first_rows))
+                all_chunks.extend(item)
+        finally:
+            stop.set()
+            # Keep draining so a producer blocked on a full queue can exit
+            while producer.is_alive():
+                try:
+                    pending.get_nowait()
+                except queue.Empty:
+                    producer.join(timeout=0.05)
+        
+        if not parts:
+            return np.empty((0, self.embedding_dimension), dtype=self.dtype), []
+        return np.concatenate(parts), all_chunks
+    
+    def _embed_batch_reusing(
+        self,
+        chunks: List[CodeChunk],
+        batch_size: Optional[int],
+        parts: List[np.ndarray],
+        first_rows: dict
+    ) -> np.ndarray:
+        """
+        Embed a batch, copying vectors for chunks of duplicate files.
+        
+        Chunks of a file with the same content as an earlier one in the
+        stream reuse the earlier chunk's vector instead of being encoded.
+        
+        Args:
+            chunks: The batch to embed
+            batch_size: Number of chunks to encode at once
+            parts: Embeddings of the batches already processed
+            first_rows: Maps chunk keys to (part, row) of their first
+                embedding; updated with this batch
+            
+        Returns:
+            Numpy array of embeddings for the batch
+        """
+        part_index = len(parts)
+        fresh = []
+        copies = []
+        
+        for i, chunk in enumerate(chunks):
+            key = (chunk.content_hash, chunk.language, chunk.chunk_index)
+            if chunk.content_hash and key in first_rows:
+                copies.append((i, first_rows[key]))
+            else:
+                fresh.append(i)
+                if chunk.content_hash:
+                    first_rows[key] = (part_index, i)
+        
+        if not copies:
+            return self.embed_chunks(chunks, batch_size, show_progress=False)
+        
+        embeddings = np.empty((len(chunks), self.embedding_dimension), dtype=self.dtype)
+        if fresh:
+            embeddings[fresh] = self.embed_chunks(
+                [chunks[i] for i in fresh], batch_size, show_progress=False
+            )
+        for i, (source_part, row) in copies:
+            source = embeddings if source_part == part_index else parts[source_part]
+            embeddings[i] = source[row]
+        
+        return embeddings
+    
+    def _is_mean_pooled_transformer(self) -> bool:
+        """
+        Check whether the model is exactly what the ONNX path reproduces.
+        
+        That is a Transformer followed by mean Pooling and an optional
+        Normalize; any other module (e.g. a Dense projection) would put
+        ONNX query vectors in a different space from the chunk vectors.
+        """
+        modules = list(self.model)
+        names = [type(module).__name__ for module in modules]
+        if names[-1:] == ["Normalize"]:
+            names.pop()
+        return (
+            names == ["Transformer", "Pooling"]
+            and modules[1].get_pooling_mode_str() == "mean"
+        )
+    
+    def _load_ort_session(self) -> bool:
+        """
+        Export the model to ONNX once and open an inference session.
+        
+        The optimized graph is cached on disk per model name so later
+        processes only pay the session load.
+        
+        Returns:
+            True if the ONNX query encoder is ready to use
+        """
+        if self._ort_session is not None:
+            return self._ort_session is not False
+        
+        self._ort_session = False
+        if not ONNX_QUERY_ENCODER or not ONNX_AVAILABLE:
+            return False
+        # The ONNX path reimplements a plain mean-pooled transformer only
+        if not self._is_mean_pooled_transformer():
+            return False
+        
+        hub_name = self.model_name
+        if "/" not in hub_name and not os.path.isdir(hub_name):
+            hub_name = f"sentence-transformers/{hub_name}"
+        export_dir = os.path.join(ONNX_CACHE_DIR, hub_name.replace("/", "__"))
+        model_file = os.path.join(export_dir, "model_optimized.onnx")
+        
+        try:
+            if not os.path.exists(model_file):
+                print(f"Exporting query encoder to ONNX: {hub_name}")
+                ort_model = ORTModelForFeatureExtraction.from_pretrained(
+                    hub_name, export=True
+                )
+                optimizer = ORTOptimizer.from_pretrained(ort_model)
+                optimizer.optimize(
+                    save_dir=export_dir,
+                    optimization_config=AutoOptimizationConfig.O3()
+                )
+                AutoTokenizer.from_pretrained(hub_name).save_pretrained(export_dir)
+            
+            self._ort_tokenizer = AutoTokenizer.from_pretrained(export_dir)
+            self._ort_session = ort.InferenceSession(
+                model_file, providers=["CPUExecutionProvider"]
+            )
+        except Exception as e:
+            print(f"ONNX query encoder unavailable, using PyTorch: {e}")
+            self._ort_session = False
+            return False
+        
+        return True
+    
+    def _embed_queries_onnx(self, queries: List[str]) -> np.ndarray:
+        """Encode queries with the ONNX session using mean pooling."""
+        encoded = self._ort_tokenizer(
+            queries,
+            padding=True,
+            truncation=True,
+            max_length=self.model.max_seq_length,
+            return_tensors="np"
+        )
+        input_names = {i.name for i in self._ort_session.get_inputs()}
+        feed = {
+            name: array.astype(np.int64)
+            for name, array in encoded.items()
+            if name in input_names
+        }
+        token_embeddings = self._ort_session.run(None, feed)[0]
+        
+        # Mean pool over real tokens, then L2-normalize
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32, copy=False)
     
     def embed_query(self, query: str) -> np.ndarray:
         """
         Generate embedding for a search query.
         
+        Uses the ONNX Runtime encoder when available, which avoids
+        the PyTorch stack on the per-question latency path.
+        
         Args:
             query: The user's question
             
         Returns:
             Numpy array of the query embedding
         """
+        if self._load_ort_session():
+            return self._embed_queries_onnx([query])[0]
         return self.generate_embedding(query)
+    
+    def embed_query_batch(self, queries: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for several search queries in one pass.
+        
+        Args:
+            queries: The user's questions
+            
+        Returns:
+            Numpy array of shape (n_queries, embedding_dim) holding
+            L2-normalized float32 vectors
+        """
+        if not queries:
+            return np.empty((0, self.embedding_dimension), dtype=np.float32)
+        
+        if self._load_ort_session():
+            return self._embed_queries_onnx(queries)
+        
+        embeddings = self.model.encode(
+            queries,
+            batch_size=len(queries),
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        return embeddings.astype(np.float32, copy=False)
+
+
+# Shared generator so every consumer in a process reuses one loaded model
+_GLOBAL_EMBEDDER: Optional[EmbeddingGenerator] = None
+_GLOBAL_EMBEDDER_LOCK = threading.Lock()
+
+
+def get_embedder() -> EmbeddingGenerator:
+    """
+    Get the process-wide embedding generator, creating it on first use.
+    
+    Returns:
+        The shared EmbeddingGenerator configured from config.py
+    """
+    global _GLOBAL_EMBEDDER
+    
+    if _GLOBAL_EMBEDDER is None:
+        with _GLOBAL_EMBEDDER_LOCK:
+            if _GLOBAL_EMBEDDER is None:
+                _GLOBAL_EMBEDDER = EmbeddingGenerator()
+    
+    return _GLOBAL_EMBEDDER
@@ -5,13 +5,57 @@ Handles reading source files from a project directory,
 filtering by supported extensions and ignoring unnecessary directories.
 """
 import os
+import codecs
+import hashlib
+import itertools
+from collections import Counter, deque
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Iterator
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import SUPPORTED_EXTENSIONS, IGNORED_DIRECTORIES
+from config import (
+    SUPPORTED_EXTENSIONS,
+    IGNORED_DIRECTORIES,
+    MAX_FILE_SIZE,
+    INGEST_WORKERS,
+)
+
+try:
+    from charset_normalizer import from_bytes
+    CHARSET_NORMALIZER_AVAILABLE = True
+except ImportError:
+    CHARSET_NORMALIZER_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+
+# Bytes used to probe a candidate encoding before decoding the whole file
+ENCODING_PROBE_SIZE = 64 * 1024
+
+
+def hash_content(content: str) -> str:
+    """
+    Hash file content to detect files that are already indexed.
+    
+    Uses xxh3 when xxhash is installed, otherwise BLAKE2b.
+    
+    Args:
+        content: Decoded file content
+        
+    Returns:
+        Hex digest of the content
+    """
+    data = content.encode("utf-8")
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
 
 
 @dataclass
@@ -21,6 +65,7 @@ class SourceFile:
     content: str
     extension: str
     relative_path: str
+    content_hash: str = ""
 
 
 class CodebaseIngester:
@@ -34,7 +79,9 @@ class CodebaseIngester:
     def __init__(
         self,
         supported_extensions: set = None,
-        ignored_directories: set = None
+        ignored_directories: set = None,
+        max_file_size: int = None,
+        max_workers: int = None
     ):
         """
         Initialize the ingester with configuration.
@@ -42,42 +89,95 @@ class CodebaseIngester:
         Args:
             supported_extensions: Set of file extensions to include
             ignored_directories: Set of directory names to skip
+            max_file_size: Skip files larger than this many bytes
+            max_workers: Number of threads reading files in parallel
         """
-        self.supported_extensions = supported_extensions or SUPPORTED_EXTENSIONS
-        self.ignored_directories = ignored_directories or IGNORED_DIRECTORIES
-    
-    def _should_ignore_directory(self, dir_name: str) -> bool:
-        """Check if a directory should be ignored."""
-        return dir_name in self.ignored_directories
+        self.supported_extensions = frozenset(
+            ext.lower() for ext in (supported_extensions or SUPPORTED_EXTENSIONS)
+        )
+        self.ignored_directories = frozenset(ignored_directories or IGNORED_DIRECTORIES)
+        # Dotless, lowercased suffixes for a plain string lookup per file
+        self._suffix_set = frozenset(ext.lstrip('.') for ext in self.supported_extensions)
+        self.max_file_size = max_file_size or MAX_FILE_SIZE
+        self.max_workers = (
+            max_workers or INGEST_WORKERS or min(32, (os.cpu_count() or 1) * 4)
+        )
+        self.stats = {"total_files": 0, "by_extension": {}}
     
-    def _is_supported_file(self, file_path: str) -> bool:
-        """Check if a file has a supported extension."""
-        return Path(file_path).suffix.lower() in self.supported_extensions
+    def _is_supported_file(self, file_name: str) -> bool:
+        """Check if a bare file name has a supported extension."""
+        # idx > 0 so dotfiles like ".py" have no suffix, as with Path.suffix
+        idx = file_name.rfind('.')
+        return idx > 0 and file_name[idx + 1:].lower() in self._suffix_set
     
     def _read_file_content(self, file_path: str) -> str:
         """
         Safely read file content with encoding fallback.
         
+        The file is read once as bytes and each candidate encoding
+        is tried on those bytes, instead of reopening the file.
+        
         Args:
             file_path: Path to the file
             
         Returns:
             File content as string, or empty string on error
         """
-        encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        except Exception as e:
+            print(f"Error reading {file_path}: {e}")
+            return ""
+        
+        if data.isascii():
+            encodings = ['ascii']  # Most source files; skips the fallback chain
+        elif data.startswith(b'\xef\xbb\xbf'):
+            # Strip the BOM when the rest is valid UTF-8, else fall back as usual
+            encodings = itertools.chain(
+                ['utf-8-sig'], self._candidate_encodings(data[:ENCODING_PROBE_SIZE])
+            )
+        else:
+            encodings = self._candidate_encodings(data[:ENCODING_PROBE_SIZE])
         
         for encoding in encodings:
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    return f.read()
-            except (UnicodeDecodeError, UnicodeError):
+                if len(data) > ENCODING_PROBE_SIZE:
+                    # Reject bad candidates on a prefix, not the whole file;
+                    # final=False tolerates a character split at the cut
+                    decoder = codecs.getincrementaldecoder(encoding)()
+                    decoder.decode(data[:ENCODING_PROBE_SIZE], final=False)
+                text = data.decode(encoding)
+            except (UnicodeDecodeError, UnicodeError, LookupError):
                 continue
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
-                return ""
+            # Match text-mode universal newlines
+            return text.replace('\r\n', '\n').replace('\r', '\n')
         
         return ""
     
+    def _candidate_encodings(self, sample: bytes) -> Iterator[str]:
+        """
+        Yield the encodings to try for non-ASCII content, most likely first.
+        
+        Detection only runs if the caller gets past utf-8 and cp1252.
+        
+        Args:
+            sample: Leading bytes of the file
+            
+        Yields:
+            Encoding names
+        """
+        yield 'utf-8'
+        yield 'cp1252'
+        
+        if CHARSET_NORMALIZER_AVAILABLE:
+            best = from_bytes(sample).best()
+            if best is not None and best.encoding not in ('utf_8', 'cp1252'):
+                yield best.encoding
+        
+        # latin-1 decodes any byte sequence, so it always ends the chain
+        yield 'latin-1'
+    
     def ingest(self, project_path: str) -> List[SourceFile]:
         """
         Ingest all supported source files from a project directory.
@@ -88,6 +188,70 @@ class CodebaseIngester:
         Returns:
             List of SourceFile objects with content and metadata
             
+        Raises:
+            ValueError: If the path doesn't exist or isn't a directory
+        """
+        return list(self.iter_files(project_path))
+    
+    def iter_files(self, project_path: str) -> Iterator[SourceFile]:
+        """
+        Lazily ingest supported source files from a project directory.
+        
+        Files are yielded as they are read, so downstream stages can
+        start before the walk finishes. Running counts are kept in
+        ``self.stats`` while iterating.
+        
+        Args:
+            project_path: Path to the project root directory
+            
+        Returns:
+            Iterator of SourceFile objects with content and metadata
+            
+        Raises:
+            ValueError: If the path doesn't exist or isn't a directory
+        """
+        project_path = self._resolve_project_path(project_path)
+        
+        self.stats = {"total_files": 0, "by_extension": {}}
+        return self._walk(project_path)
+    
+    def fingerprint(self, project_path: str) -> str:
+        """
+        Hash the path, size and modification time of every candidate file.
+        
+        Changes whenever a supported file is added, removed or modified,
+        without reading any file contents.
+        
+        Args:
+            project_path: Path to the project root directory
+            
+        Returns:
+            Hex digest identifying the current state of the project
+            
+        Raises:
+            ValueError: If the path doesn't exist or isn't a directory
+        """
+        project_path = self._resolve_project_path(project_path)
+        digest = hashlib.blake2b(digest_size=16)
+        
+        candidates = sorted(self._collect_candidates(project_path), key=lambda e: e.path)
+        
+        for entry in candidates:
+            try:
+                stat = entry.stat()  # Cached by the size check during the walk
+            except OSError:
+                continue
+            relative_path = os.path.relpath(entry.path, project_path)
+            digest.update(
+                f"{relative_path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8")
+            )
+        
+        return digest.hexdigest()
+    
+    def _resolve_project_path(self, project_path: str) -> Path:
+        """
+        Resolve and validate a project root directory.
+        
         Raises:
             ValueError: If the path doesn't exist or isn't a directory
         """
@@ -99,48 +263,109 @@ class CodebaseIngester:
         if not project_path.is_dir():
             raise ValueError(f"Path is not a directory: {project_path}")
         
-        source_files: List[SourceFile] = []
+        return project_path
+    
+    def _collect_candidates(self, project_path: Path) -> List[os.DirEntry]:
+        """
+        Walk the project tree and list files worth reading.
+        
+        Uses an explicit stack over os.scandir so file type and size
+        come from the directory entries instead of separate path lookups.
+        Symlinked directories are not followed, matching os.walk.
         
-        for root, dirs, files in os.walk(project_path):
-            # Filter out ignored directories (modifies dirs in-place)
-            dirs[:] = [d for d in dirs if not self._should_ignore_directory(d)]
+        Args:
+            project_path: Resolved project root directory
             
-            for file_name in files:
-                file_path = os.path.join(root, file_name)
-                
-                if not self._is_supported_file(file_path):
-                    continue
+        Returns:
+            Directory entries of supported files within the size limit
+        """
+        candidates = []
+        pending = deque([str(project_path)])
+        ignored = self.ignored_directories
+        
+        while pending:
+            directory = pending.pop()
+            
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if entry.name not in ignored:
+                                    pending.append(entry.path)
+                            elif entry.is_file() and self._is_supported_file(entry.name):
+                                # Skip oversized files before reading
+                                if entry.stat().st_size <= self.max_file_size:
+                                    candidates.append(entry)
+                        except OSError:
+                            continue
+            except OSError:
+                continue  # Unreadable directory
+        
+        return candidates
+    
+    def _walk(self, project_path: Path) -> Iterator[SourceFile]:
+        """Read candidate files on a thread pool and yield them in walk order."""
+        by_extension = self.stats["by_extension"]
+        candidates = self._collect_candidates(project_path)
+        
+        # Keep a bounded number of reads in flight so unconsumed contents
+        # don't pile up, refilling as each result is handed downstream
+        window = self.max_workers * 4
+        pending = deque()
+        next_index = 0
+        
+        # Entry paths are the root joined with relative parts, so slicing
+        # off the root gives the relative path without os.path.relpath
+        root_length = len(os.path.join(str(project_path), ""))
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or next_index < len(candidates):
+                while next_index < len(candidates) and len(pending) < window:
+                    entry = candidates[next_index]
+                    future = executor.submit(self._read_file_content, entry.path)
+                    pending.append((entry, future))
+                    next_index += 1
                 
-                content = self._read_file_content(file_path)
+                entry, future = pending.popleft()
+                content = future.result()
                 
                 if not content.strip():
                     continue  # Skip empty files
                 
-                relative_path = os.path.relpath(file_path, project_path)
+                name = entry.name
+                extension = name[name.rfind('.'):].lower()
                 
-                source_files.append(SourceFile(
-                    file_path=file_path,
+                self.stats["total_files"] += 1
+                by_extension[extension] = by_extension.get(extension, 0) + 1
+                
+                yield SourceFile(
+                    file_path=entry.path,
                     content=content,
-                    extension=Path(file_path).suffix.lower(),
-                    relative_path=relative_path
-                ))
-        
-        return source_files
+                    extension=extension,
+                    relative_path=entry.path[root_length:],
+                    content_hash=hash_content(content)
+                )
     
-    def get_stats(self, source_files: List[SourceFile]) -> dict:
+    def get_stats(self, source_files: Optional[List[SourceFile]] = None) -> dict:
         """
         Get statistics about ingested files.
         
+        Without an argument, returns the running counts from the most
+        recent ``iter_files`` pass, so streaming callers never need to
+        hold the files in a list.
+        
         Args:
-            source_files: List of ingested source files
+            source_files: List of ingested source files (optional)
             
         Returns:
             Dictionary with file counts by extension
         """
-        stats = {"total_files": len(source_files), "by_extension": {}}
-        
-        for sf in source_files:
-            ext = sf.extension
-            stats["by_extension"][ext] = stats["by_extension"].get(ext, 0) + 1
+        if source_files is None:
+            return {
+                "total_files": self.stats["total_files"],
+                "by_extension": dict(self.stats["by_extension"])
+            }
         
-        return stats
+        by_extension = Counter(sf.extension for sf in source_files)
+        return {"total_files": len(source_files), "by_extension": dict(by_extension)}
@@ -4,12 +4,15 @@ Question Processing Module
 Handles user questions by converting them to embeddings
 and performing similarity search against stored vectors.
 """
-from typing import List
+import io
+import hashlib
+from collections import OrderedDict
+from typing import List, Optional
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import TOP_K_RESULTS
+from config import TOP_K_RESULTS, QUERY_CACHE_SIZE
 from modules.embeddings import EmbeddingGenerator
 from modules.vector_store import VectorStore, SearchResult
 
@@ -20,13 +23,16 @@ class QuestionProcessor:
     
     Converts natural language questions to embeddings and
     performs similarity search against the vector store.
+    Results for recently asked questions are cached until
+    the vector store changes.
     """
     
     def __init__(
         self, 
         embedding_generator: EmbeddingGenerator,
         vector_store: VectorStore,
-        top_k: int = None
+        top_k: int = None,
+        cache_size: int = None
     ):
         """
         Initialize the question processor.
@@ -35,10 +41,26 @@ class QuestionProcessor:
             embedding_generator: For converting questions to vectors
             vector_store: For similarity search
             top_k: Number of chunks to retrieve
+            cache_size: Number of questions to cache results for
         """
         self.embedding_generator = embedding_generator
         self.vector_store = vector_store
         self.top_k = top_k or TOP_K_RESULTS
+        self.cache_size = QUERY_CACHE_SIZE if cache_size is None else cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._case_insensitive: Optional[bool] = None
+    
+    def _cache_key(self, question: str) -> tuple:
+        """Build a cache key from the normalized question and search state."""
+        if self._case_insensitive is None:
+            # Case only matters to the cache if the model can see it
+            self._case_insensitive = self.embedding_generator.lowercases_input
+        
+        normalized = " ".join(question.split())
+        if self._case_insensitive:
+            normalized = normalized.lower()
+        digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+        return (self.vector_store.generation, self.top_k, digest)
     
     def process(self, question: str) -> List[SearchResult]:
         """
@@ -50,14 +72,67 @@ class QuestionProcessor:
         Returns:
             List of SearchResult objects with relevant chunks
         """
+        key = self._cache_key(question)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return list(cached)
+        
         # Generate embedding for the question
         query_embedding = self.embedding_generator.embed_query(question)
         
         # Search for similar chunks
         results = self.vector_store.search(query_embedding, self.top_k)
         
+        if self.cache_size > 0:
+            self._cache[key] = tuple(results)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        
         return results
     
+    def process_batch(self, questions: List[str]) -> List[List[SearchResult]]:
+        """
+        Process several questions with one embedding and search call.
+        
+        Cached questions are answered from the cache; the rest are
+        embedded together and searched as a single batch.
+        
+        Args:
+            questions: The user's natural language questions
+            
+        Returns:
+            One list of SearchResult objects per question, in input order
+        """
+        keys = [self._cache_key(question) for question in questions]
+        found = {}
+        missing = {}
+        
+        for key, question in zip(keys, questions):
+            if key in found or key in missing:
+                continue
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                found[key] = cached
+            else:
+                missing[key] = question
+        
+        if missing:
+            query_embeddings = self.embedding_generator.embed_query_batch(
+                list(missing.values())
+            )
+            batch_results = self.vector_store.search_batch(query_embeddings, self.top_k)
+            
+            for key, results in zip(missing, batch_results):
+                found[key] = tuple(results)
+                if self.cache_size > 0:
+                    self._cache[key] = found[key]
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        
+        return [list(found[key]) for key in keys]
+    
     def format_context(self, results: List[SearchResult]) -> str:
         """
         Format search results as context for the LLM.
@@ -71,16 +146,19 @@ class QuestionProcessor:
         if not results:
             return "No relevant code found."
         
-        context_parts = []
+        # Write straight into one buffer instead of a list of parts
+        buffer = io.StringIO()
+        separator = ""
         
         for result in results:
             chunk = result.chunk
-            context_parts.append(
-                f"--- File: {chunk.relative_path} (Relevance: {result.score:.3f}) ---\n"
+            buffer.write(
+                f"{separator}--- File: {chunk.relative_path} (Relevance: {result.score:.3f}) ---\n"
                 f"```{chunk.language}\n{chunk.content}\n```"
             )
+            separator = "\n\n"
         
-        return "\n\n".join(context_parts)
+        return buffer.getvalue()
     
     def get_file_references(self, results: List[SearchResult]) -> List[str]:
         """
@@ -92,13 +170,5 @@ class QuestionProcessor:
         Returns:
             List of unique relative file paths
         """
-        seen = set()
-        files = []
-        
-        for result in results:
-            path = result.chunk.relative_path
-            if path not in seen:
-                seen.add(path)
-                files.append(path)
-        
-        return files
+        # dict keys are unique and keep first-seen order
+        return list(dict.fromkeys(result.chunk.relative_path for result in results))
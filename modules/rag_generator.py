@@ -5,7 +5,10 @@ Uses retrieved code context to generate accurate,
 grounded answers using Google Gemini SDK.
 """
 
-from typing import List
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, AsyncIterator, Optional, Tuple
 from dataclasses import dataclass
 import google.generativeai as genai
 
@@ -37,6 +40,26 @@ Rules:
 5. Use code snippets if helpful
 """
 
+# Constant parts of the prompt, joined once so only context and question
+# are substituted per request
+_PROMPT_HEAD = f"\n{SYSTEM_PROMPT}\n\n### Code Context\n"
+_PROMPT_MID = "\n\n### Question\n"
+_PROMPT_TAIL = "\n\n### Answer\n"
+
+_NO_CONTEXT_ANSWER = "No relevant context found to answer the question."
+
+
+# Retrieval is CPU-bound and touches shared state (model, index, query
+# cache), so async callers run it off the event loop one at a time
+_RETRIEVAL_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retrieval")
+
+
+@functools.lru_cache(maxsize=8)
+def _get_model(api_key: str, model_name: str) -> genai.GenerativeModel:
+    """Configure the Gemini API once and share the model per key and name."""
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
 
 class RAGGenerator:
     """
@@ -57,51 +80,106 @@ class RAGGenerator:
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY is missing in config or .env file")
 
-        # Configure the Gemini API
-        genai.configure(api_key=self.api_key)
-        
-        # Create the model instance
-        self.model = genai.GenerativeModel(self.model_name)
+        # Reuse the configured model across generators (e.g. every /load)
+        self.model = _get_model(self.api_key, self.model_name)
 
     def _build_prompt(self, question: str, context: str) -> str:
         """Build a prompt combining system instructions and context."""
-        return f"""
-{SYSTEM_PROMPT}
+        return f"{_PROMPT_HEAD}{context}{_PROMPT_MID}{question}{_PROMPT_TAIL}"
 
-### Code Context
-{context}
-
-### Question
-{question}
+    def _prepare(
+        self,
+        question: str,
+        results: List[SearchResult]
+    ) -> Tuple[Optional[str], RAGResponse]:
+        """
+        Build the prompt and the response for retrieved results.
+        
+        Returns:
+            Tuple of (prompt, response). The prompt is None when there is
+            no context, and the response is then already final; otherwise
+            its answer is filled in by the caller.
+        """
+        if not results:
+            return None, RAGResponse(
+                answer=_NO_CONTEXT_ANSWER,
+                source_files=[],
+                chunks_used=0
+            )
 
-### Answer
-"""
+        context = self.question_processor.format_context(results)
+        return self._build_prompt(question, context), RAGResponse(
+            answer="",
+            source_files=self.question_processor.get_file_references(results),
+            chunks_used=len(results)
+        )
 
     def generate(self, question: str) -> RAGResponse:
         """Generate an answer for a question using RAG."""
         results = self.question_processor.process(question)
-        context = self.question_processor.format_context(results)
-        source_files = self.question_processor.get_file_references(results)
-        prompt = self._build_prompt(question, context)
+        return self.generate_with_context(question, results)
 
-        if not results:
-            return RAGResponse(
-                answer="No relevant context found to answer the question.",
-                source_files=[],
-                chunks_used=0
-            )
+    async def retrieve(self, question: str) -> List[SearchResult]:
+        """Retrieve context for a question on the shared retrieval thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _RETRIEVAL_EXECUTOR, self.question_processor.process, question
+        )
+
+    async def generate_async(self, question: str) -> RAGResponse:
+        """Generate an answer without blocking the event loop."""
+        results = await self.retrieve(question)
+        return await self._answer_async(question, results)
+
+    async def generate_many(self, questions: List[str]) -> List[RAGResponse]:
+        """Answer several questions with one batched retrieval and concurrent Gemini calls."""
+        loop = asyncio.get_running_loop()
+        batch_results = await loop.run_in_executor(
+            _RETRIEVAL_EXECUTOR, self.question_processor.process_batch, questions
+        )
+        return list(await asyncio.gather(*(
+            self._answer_async(question, results)
+            for question, results in zip(questions, batch_results)
+        )))
+
+    async def _answer_async(
+        self,
+        question: str,
+        results: List[SearchResult]
+    ) -> RAGResponse:
+        """Await Gemini for an answer grounded in pre-retrieved results."""
+        prompt, response = self._prepare(question, results)
+        if prompt is None:
+            return response
 
         try:
-            response = self.model.generate_content(prompt)
-            answer = response.text.strip()
+            answer = await self.model.generate_content_async(prompt)
+            response.answer = answer.text.strip()
         except Exception as e:
-            answer = f"Gemini error: {str(e)}"
+            response.answer = f"Gemini error: {str(e)}"
 
-        return RAGResponse(
-            answer=answer,
-            source_files=source_files,
-            chunks_used=len(results)
-        )
+        return response
+
+    async def stream(
+        self,
+        question: str,
+        results: List[SearchResult] = None
+    ) -> AsyncIterator[str]:
+        """Stream answer text as Gemini produces it, retrieving if needed."""
+        if results is None:
+            results = await self.retrieve(question)
+
+        prompt, _ = self._prepare(question, results)
+        if prompt is None:
+            yield _NO_CONTEXT_ANSWER
+            return
+
+        try:
+            response = await self.model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                yield chunk.text
+        except Exception as e:
+            yield f"Gemini error: {str(e)}"
 
     def generate_with_context(
         self,
@@ -109,25 +187,14 @@ class RAGGenerator:
         results: List[SearchResult]
     ) -> RAGResponse:
         """Generate an answer using pre-retrieved search results."""
-        context = self.question_processor.format_context(results)
-        source_files = self.question_processor.get_file_references(results)
-        prompt = self._build_prompt(question, context)
-
-        if not results:
-            return RAGResponse(
-                answer="No relevant context found to answer the question.",
-                source_files=[],
-                chunks_used=0
-            )
+        prompt, response = self._prepare(question, results)
+        if prompt is None:
+            return response
 
         try:
-            response = self.model.generate_content(prompt)
-            answer = response.text.strip()
+            answer = self.model.generate_content(prompt)
+            response.answer = answer.text.strip()
         except Exception as e:
-            answer = f"Gemini error: {str(e)}"
+            response.answer = f"Gemini error: {str(e)}"
 
-        return RAGResponse(
-            answer=answer,
-            source_files=source_files,
-            chunks_used=len(results)
-        )
+        return response
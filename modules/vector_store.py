@@ -4,14 +4,66 @@ Vector Store Module
 Manages FAISS vector database for storing and
 retrieving code chunk embeddings.
 """
+import math
+import hashlib
+import pickle
+import threading
 import numpy as np
 from typing import List, Tuple, Optional
 from dataclasses import dataclass
 import faiss
 
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (
+    VECTOR_INDEX,
+    HNSW_MIN_VECTORS,
+    IVF_MIN_VECTORS,
+    HNSW_M,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+    IVF_NPROBE,
+    MAX_TRAINING_VECTORS,
+    VECTOR_QUANTIZATION,
+    PQ_M,
+    FAISS_THREADS,
+)
 from modules.chunking import CodeChunk
 
 
+if FAISS_THREADS > 0:
+    faiss.omp_set_num_threads(FAISS_THREADS)
+
+# FAISS index_factory codec for each quantization setting
+QUANTIZATION_CODECS = {
+    "none": "Flat",
+    "fp16": "SQfp16",
+    "int8": "SQ8",
+    "pq": "PQ{m}",
+}
+
+# Pinned so sidecars stay readable by every supported Python (3.8+ reads 5)
+PICKLE_PROTOCOL = 5
+
+# Read size used when hashing a saved index file
+DIGEST_BLOCK_SIZE = 1 << 20
+
+# FAISS wants ~39 training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+# 8-bit PQ trains 256 centroids per sub-quantizer
+PQ_MIN_TRAINING_VECTORS = MIN_POINTS_PER_CENTROID * 256
+
+
+def _file_digest(path: str) -> str:
+    """Hash a file's bytes in blocks, without loading it whole."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(DIGEST_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
 @dataclass
 class SearchResult:
     """Represents a search result with chunk and score."""
@@ -25,27 +77,147 @@ class VectorStore:
     FAISS-based vector store for code embeddings.
     
     Stores embeddings alongside chunk metadata for
-    fast similarity-based retrieval.
+    fast similarity-based retrieval. Small stores use an
+    exact flat index; larger ones switch to an HNSW graph
+    for sub-linear search, and very large ones to IVF-PQ
+    inverted lists. Stored vectors can optionally
+    be compressed with fp16/int8 scalar or product quantization.
     """
     
-    def __init__(self, dimension: int = 384):
+    INDEX_TYPES = ("auto", "flat", "hnsw", "ivf")
+    
+    def __init__(
+        self,
+        dimension: int = 384,
+        index_type: str = None,
+        quantization: str = None,
+        pre_normalized: bool = False
+    ):
         """
         Initialize the vector store.
         
         Args:
             dimension: Dimension of embedding vectors
+            index_type: One of "auto", "flat", "hnsw" or "ivf"
+            quantization: One of "none", "fp16", "int8" or "pq"
+            pre_normalized: Whether added embeddings are already
+                L2-normalized, so add_embeddings can skip normalizing
+            
+        Raises:
+            ValueError: If the index type or quantization is not recognized
         """
+        self.index_type = (index_type or VECTOR_INDEX).lower()
+        if self.index_type not in self.INDEX_TYPES:
+            raise ValueError(
+                f"Unknown index type: {self.index_type} "
+                f"(expected one of {', '.join(self.INDEX_TYPES)})"
+            )
+        
+        self.quantization = (quantization or VECTOR_QUANTIZATION).lower()
+        if self.quantization not in QUANTIZATION_CODECS:
+            raise ValueError(
+                f"Unknown quantization: {self.quantization} "
+                f"(expected one of {', '.join(QUANTIZATION_CODECS)})"
+            )
+        
         self.dimension = dimension
-        self.index: Optional[faiss.IndexFlatIP] = None
+        self.pre_normalized = pre_normalized
+        self.index: Optional[faiss.Index] = None
         self.chunks: List[CodeChunk] = []
+        self._active_index_type: Optional[str] = None
+        self._active_quantization: Optional[str] = None
+        self._hnsw = None
         self._is_initialized = False
+        # Reused by single-query search; the lock keeps threads off it
+        self._query_buffer: Optional[np.ndarray] = None
+        self._query_lock = threading.Lock()
+        # Bumped on every change so callers can invalidate cached searches
+        self.generation = 0
+    
+    def _resolve_index_type(self, num_vectors: int) -> str:
+        """Pick the concrete index type for the expected store size."""
+        if self.index_type != "auto":
+            return self.index_type
+        # Past this size even HNSW over full vectors gets memory-bound
+        if num_vectors >= IVF_MIN_VECTORS:
+            return "ivf"
+        # Brute force is exact and fast enough for small repositories
+        return "hnsw" if num_vectors >= HNSW_MIN_VECTORS else "flat"
+    
+    def _resolve_quantization(self, num_vectors: int) -> str:
+        """Pick the concrete quantization for the expected store size."""
+        if self.quantization != "pq":
+            # Large auto-sized stores get IVF-PQ when the dimension allows it
+            auto_pq = (
+                self.index_type == "auto"
+                and num_vectors >= IVF_MIN_VECTORS
+                and self.dimension % PQ_M == 0
+            )
+            if not auto_pq:
+                return self.quantization
+        
+        if self.dimension % PQ_M:
+            raise ValueError(
+                f"PQ_M ({PQ_M}) must divide the embedding dimension ({self.dimension})"
+            )
+        # Too few vectors to train PQ codebooks; scalar int8 needs no such data
+        if num_vectors < PQ_MIN_TRAINING_VECTORS:
+            return "int8"
+        return "pq"
     
-    def _initialize_index(self):
-        """Create a new FAISS index."""
-        # Using Inner Product (cosine similarity) index
-        self.index = faiss.IndexFlatIP(self.dimension)
+    def _initialize_index(self, num_vectors: int = 0):
+        """
+        Create a new FAISS index.
+        
+        Args:
+            num_vectors: Number of vectors about to be added, used
+                to choose the index type and quantization
+        """
+        self._active_index_type = self._resolve_index_type(num_vectors)
+        self._active_quantization = self._resolve_quantization(num_vectors)
+        
+        codec = QUANTIZATION_CODECS[self._active_quantization].format(m=PQ_M)
+        if self._active_index_type == "hnsw":
+            # HNSW graph over (optionally compressed) vectors
+            description = f"HNSW{HNSW_M}" if codec == "Flat" else f"HNSW{HNSW_M}_{codec}"
+        elif self._active_index_type == "ivf":
+            # Inverted lists over 4*sqrt(N) centroids, capped so each has
+            # enough training points; only nprobe lists are scanned
+            nlist = min(
+                int(4 * math.sqrt(num_vectors)),
+                min(num_vectors, MAX_TRAINING_VECTORS) // MIN_POINTS_PER_CENTROID
+            )
+            description = f"IVF{max(1, nlist)},{codec}"
+        else:
+            description = codec
+        
+        # Inner Product metric (cosine similarity on normalized vectors)
+        if self._active_index_type == "hnsw" and self._active_quantization == "pq":
+            # index_factory ignores the metric for HNSW over PQ codes and
+            # builds an L2 index, so construct it directly
+            self.index = faiss.IndexHNSWPQ(
+                self.dimension, PQ_M, HNSW_M, 8, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            self.index = faiss.index_factory(
+                self.dimension, description, faiss.METRIC_INNER_PRODUCT
+            )
+        assert self.index.metric_type == faiss.METRIC_INNER_PRODUCT, description
+        self._configure_index()
+        
         self._is_initialized = True
     
+    def _configure_index(self):
+        """Apply build and search parameters for the active index type."""
+        self._hnsw = None
+        self._query_buffer = np.empty((1, self.dimension), dtype=np.float32)
+        
+        if self._active_index_type == "hnsw":
+            self._hnsw = faiss.downcast_index(self.index).hnsw
+            self._hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        elif self._active_index_type == "ivf":
+            faiss.extract_index_ivf(self.index).nprobe = IVF_NPROBE
+    
     def add_embeddings(
         self, 
         embeddings: np.ndarray, 
@@ -54,8 +226,13 @@ class VectorStore:
         """
         Add embeddings and their associated chunks to the store.
         
+        The caller's array is never modified. Unless the store was
+        created with ``pre_normalized=True``, the vectors are copied and
+        L2-normalized here; otherwise they must already be unit length
+        and are passed to FAISS without a copy when already float32.
+        
         Args:
-            embeddings: Numpy array of shape (n, dimension)
+            embeddings: Numpy array of shape (n, dimension), float16 or float32
             chunks: List of CodeChunk objects (same length as embeddings)
             
         Raises:
@@ -69,16 +246,26 @@ class VectorStore:
         
         if not self._is_initialized:
             self.dimension = embeddings.shape[1]
-            self._initialize_index()
+            self._initialize_index(len(embeddings))
+        
+        if self.pre_normalized:
+            # FAISS works on float32; only fp16 input needs converting
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        else:
+            # Private float32 copy, normalized in place for cosine similarity
+            embeddings = np.array(embeddings, dtype=np.float32, order="C")
+            faiss.normalize_L2(embeddings)
         
-        # Normalize embeddings for cosine similarity
-        faiss.normalize_L2(embeddings)
+        # IVF centroids and quantized codecs are learned from the first batch
+        if not self.index.is_trained:
+            self.index.train(embeddings[:MAX_TRAINING_VECTORS])
         
         # Add to FAISS index
-        self.index.add(embeddings.astype(np.float32))
+        self.index.add(embeddings)
         
         # Store chunks for retrieval
         self.chunks.extend(chunks)
+        self.generation += 1
     
     def search(
         self, 
@@ -101,33 +288,167 @@ class VectorStore:
         if not self._is_initialized or self.index.ntotal == 0:
             raise ValueError("Vector store is empty. Load a repository first.")
         
-        # Normalize query for cosine similarity
-        query = query_embedding.reshape(1, -1).astype(np.float32)
-        faiss.normalize_L2(query)
+        with self._query_lock:
+            # Cast into the preallocated buffer and normalize it in place,
+            # leaving the caller's array untouched
+            np.copyto(self._query_buffer, query_embedding.reshape(1, -1))
+            faiss.normalize_L2(self._query_buffer)
+            return self._search_normalized(self._query_buffer, top_k)[0]
+    
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = 5
+    ) -> List[List[SearchResult]]:
+        """
+        Search for several query embeddings in one index call.
+        
+        FAISS scores a batch of queries together (a single matrix
+        product for flat indexes), so this is much cheaper than
+        searching the queries one at a time.
+        
+        Args:
+            query_embeddings: Array of shape (n_queries, dimension)
+            top_k: Number of results to return per query
+            
+        Returns:
+            One list of SearchResult objects per query, in input order
+            
+        Raises:
+            ValueError: If the store is empty
+        """
+        if not self._is_initialized or self.index.ntotal == 0:
+            raise ValueError("Vector store is empty. Load a repository first.")
+        
+        # Normalize queries for cosine similarity
+        queries = query_embeddings.astype(np.float32)
+        faiss.normalize_L2(queries)
         
+        return self._search_normalized(queries, top_k)
+    
+    def _search_normalized(
+        self,
+        queries: np.ndarray,
+        top_k: int
+    ) -> List[List[SearchResult]]:
+        """Search with float32, L2-normalized queries and build results."""
         # Limit k to available vectors
         k = min(top_k, self.index.ntotal)
         
-        # Search
-        scores, indices = self.index.search(query, k)
+        if self._hnsw is not None:
+            # Search breadth must cover k for good recall
+            self._hnsw.efSearch = max(HNSW_EF_SEARCH, 2 * k)
         
-        # Build results
-        results = []
-        for rank, (score, idx) in enumerate(zip(scores[0], indices[0])):
-            if idx >= 0 and idx < len(self.chunks):
-                results.append(SearchResult(
-                    chunk=self.chunks[idx],
-                    score=float(score),
-                    rank=rank + 1
-                ))
+        # Search
+        scores, indices = self.index.search(queries, k)
         
-        return results
+        # Build results; FAISS pads missing hits with -1, and every other
+        # id is below ntotal == len(self.chunks)
+        chunks = self.chunks
+        return [
+            [
+                SearchResult(chunk=chunks[idx], score=score, rank=rank + 1)
+                for rank, (score, idx) in enumerate(zip(query_scores, query_indices))
+                if idx >= 0
+            ]
+            for query_scores, query_indices in zip(scores.tolist(), indices.tolist())
+        ]
     
     def clear(self) -> None:
         """Clear all data from the vector store."""
         self.index = None
         self.chunks = []
+        self._active_index_type = None
+        self._active_quantization = None
+        self._hnsw = None
         self._is_initialized = False
+        self.generation += 1
+    
+    def save(self, path: str) -> None:
+        """
+        Persist the index and chunk metadata to disk.
+        
+        Writes ``{path}.faiss`` and ``{path}.chunks.pkl``. Each is
+        written to a temporary file and moved into place. The chunk
+        file records a digest of the index file, so if a save is
+        interrupted between the two moves, load() detects the new
+        index next to the old chunk file and refuses to load it.
+        
+        Args:
+            path: Base path for the saved files
+            
+        Raises:
+            ValueError: If the store is empty
+        """
+        if not self._is_initialized:
+            raise ValueError("Vector store is empty. Nothing to save.")
+        
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        faiss.write_index(self.index, f"{path}.faiss.tmp")
+        index_digest = _file_digest(f"{path}.faiss.tmp")
+        os.replace(f"{path}.faiss.tmp", f"{path}.faiss")
+        
+        metadata = {
+            "index_digest": index_digest,
+            "chunks": self.chunks,
+            "index_type": self.index_type,
+            "quantization": self.quantization,
+            "pre_normalized": self.pre_normalized,
+            "active_index_type": self._active_index_type,
+            "active_quantization": self._active_quantization,
+        }
+        tmp_path = f"{path}.chunks.pkl.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(metadata, f, protocol=PICKLE_PROTOCOL)
+        os.replace(tmp_path, f"{path}.chunks.pkl")
+    
+    @staticmethod
+    def exists(path: str) -> bool:
+        """Check whether a complete saved store exists at a base path."""
+        return os.path.exists(f"{path}.faiss") and os.path.exists(f"{path}.chunks.pkl")
+    
+    @classmethod
+    def load(cls, path: str) -> "VectorStore":
+        """
+        Load a store previously written with save().
+        
+        Args:
+            path: Base path the store was saved under
+            
+        Returns:
+            A ready-to-search VectorStore
+            
+        Raises:
+            ValueError: If the index and chunk files don't match
+        """
+        with open(f"{path}.chunks.pkl", "rb") as f:
+            metadata = pickle.load(f)
+        
+        if metadata.get("index_digest") != _file_digest(f"{path}.faiss"):
+            raise ValueError(f"Saved index doesn't match its chunk file: {path}")
+        
+        index = faiss.read_index(f"{path}.faiss")
+        if index.ntotal != len(metadata["chunks"]):
+            raise ValueError(
+                f"Saved index has {index.ntotal} vectors but "
+                f"{len(metadata['chunks'])} chunks: {path}"
+            )
+        
+        store = cls(
+            index_type=metadata["index_type"],
+            quantization=metadata["quantization"],
+            pre_normalized=metadata.get("pre_normalized", False)
+        )
+        store.index = index
+        store.dimension = store.index.d
+        store.chunks = metadata["chunks"]
+        store._active_index_type = metadata["active_index_type"]
+        store._active_quantization = metadata["active_quantization"]
+        store._configure_index()
+        store._is_initialized = True
+        store.generation += 1
+        
+        return store
     
     @property
     def size(self) -> int:
@@ -144,5 +465,7 @@ class VectorStore:
             "total_vectors": self.size,
             "total_chunks": len(self.chunks),
             "unique_files": len(unique_files),
-            "dimension": self.dimension
+            "dimension": self.dimension,
+            "index_type": self._active_index_type,
+            "quantization": self._active_quantization
         }
@@ -5,6 +5,7 @@ setup(
     version="1.0.0",
     packages=find_packages(),
     py_modules=['cli'],
+    python_requires=">=3.10",
     install_requires=[
         "fastapi==0.109.0",
         "uvicorn[standard]==0.27.0",
@@ -0,0 +1,57 @@
+"""
+Tests for syntax-tree chunking.
+
+Run with: python -m unittest discover tests
+"""
+
+import glob
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.chunking import CodeChunker, _get_parser_for, _split_syntax_node
+from modules.ingestion import SourceFile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _non_whitespace(text: str) -> str:
+    return "".join(text.split())
+
+
+@unittest.skipIf(_get_parser_for(".py") is None, "tree-sitter Python grammar not available")
+class SyntaxTreeChunkingTest(unittest.TestCase):
+
+    def test_text_after_last_child_is_kept(self):
+        # string_content has escape_sequence children; text after the last
+        # escape used to be dropped when the string was split
+        content = (
+            '"""Doc line one\n'
+            '\\\\ escaped\n'
+            'LOST TEXT that must survive\n'
+            '"""\n'
+            'x = 1\n'
+        )
+        source_file = SourceFile("doc.py", content, ".py", "doc.py")
+        chunks = CodeChunker(chunk_size=40, use_ast=True).chunk_file(source_file)
+
+        self.assertEqual(
+            _non_whitespace("".join(chunk.content for chunk in chunks)),
+            _non_whitespace(content)
+        )
+
+    def test_pieces_cover_source(self):
+        parser = _get_parser_for(".py")
+        for path in glob.glob(os.path.join(REPO_ROOT, "modules", "*.py")):
+            with open(path, "rb") as f:
+                source = f.read()
+            tree = parser.parse(source)
+            for max_size in (200, 1000):
+                with self.subTest(path=os.path.basename(path), max_size=max_size):
+                    pieces, trailing = _split_syntax_node(tree.root_node, source, max_size, 0)
+                    self.assertEqual(b"".join(pieces) + trailing, source)
+
+
+if __name__ == "__main__":
+    unittest.main()